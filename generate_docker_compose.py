@@ -1,5 +1,97 @@
 import os
-import yaml
+import re
+import sys
+
+# Caracteres con los que un string puede ir sin comillas (sin espacios ni indicadores de YAML)
+_PLAIN_SAFE = re.compile(r"[A-Za-z0-9_./${}:,-]+")
+# Primer carácter que YAML interpretaría como indicador
+_INDICATORS = set("-?:,[]{}#&*!|>'\"%@`")
+# Strings que YAML 1.1 resolvería como booleano, null, número (decimal, octal, hex,
+# binario, base 60, float) o fecha; van entre comillas para que se lean como texto
+_IMPLICIT_TYPE = re.compile(
+    r"""(?:yes|no|true|false|on|off|y|n|null|~
+    |[-+]?\.?[0-9][0-9A-Za-z_.+-]*
+    |[-+]?[0-9][0-9_]*(?::[0-5]?[0-9])+(?:\.[0-9_]*)?
+    |[-+]?\.(?:inf|nan)
+    |[0-9]{4}-[0-9]{1,2}-[0-9]{1,2}[Tt].*)""",
+    re.IGNORECASE | re.VERBOSE
+)
+
+
+def _double_quoted(value):
+    """String YAML entre comillas dobles; lo no imprimible se escapa por code point."""
+    out = []
+    for ch in value:
+        if ch in '"\\':
+            out.append("\\" + ch)
+        elif ch.isprintable():
+            out.append(ch)
+        elif ord(ch) <= 0xFF:
+            out.append(f"\\x{ord(ch):02X}")
+        elif ord(ch) <= 0xFFFF:
+            out.append(f"\\u{ord(ch):04X}")
+        else:
+            out.append(f"\\U{ord(ch):08X}")
+    return '"' + "".join(out) + '"'
+
+
+def _yaml_scalar(value):
+    # bool es subclase de int: se resuelve antes
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, int):
+        return str(value)
+    if not isinstance(value, str):
+        raise TypeError(f"Tipo no soportado en docker-compose: {type(value).__name__}")
+    if (_PLAIN_SAFE.fullmatch(value) and value[0] not in _INDICATORS
+            and not value.endswith(":") and not _IMPLICIT_TYPE.fullmatch(value)):
+        return value
+    if not value.isprintable():
+        # Saltos de línea y caracteres de control: string entre comillas dobles con escapes
+        return _double_quoted(value)
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _emit_mapping(mapping, indent, lines):
+    pad = " " * indent
+    for key, value in mapping.items():
+        key = _yaml_scalar(key)
+        if isinstance(value, dict):
+            if not value:
+                lines.append(f"{pad}{key}: {{}}")
+                continue
+            lines.append(f"{pad}{key}:")
+            _emit_mapping(value, indent + 2, lines)
+        elif isinstance(value, list):
+            if not value:
+                lines.append(f"{pad}{key}: []")
+                continue
+            lines.append(f"{pad}{key}:")
+            for item in value:
+                if isinstance(item, (dict, list)):
+                    raise TypeError("Solo se soportan listas de escalares en docker-compose")
+                lines.append(f"{pad}- {_yaml_scalar(item)}")
+        else:
+            lines.append(f"{pad}{key}: {_yaml_scalar(value)}")
+
+
+def dump_compose(compose):
+    """Serializa el docker-compose a YAML (UTF-8).
+
+    Emisor específico del esquema que genera este script: mappings anidados,
+    listas de escalares y escalares str/int/bool. Respeta el layout de
+    yaml.dump(..., sort_keys=False, default_flow_style=False, indent=2), pero
+    pone entre comillas simples cualquier string que no sea claramente texto
+    plano, así que puede citar algunos valores que PyYAML dejaría sin comillas.
+    Los strings con caracteres no imprimibles van entre comillas dobles, con
+    esos caracteres escapados como \\x.., \\u.... o \\U........
+    Cualquier otro tipo lanza TypeError.
+    """
+    lines = []
+    _emit_mapping(compose, 0, lines)
+    lines.append("")
+    return "\n".join(lines).encode("utf-8")
+
 
 node_config = [
     {"name": "node0", "rdb": "redis_node_0_5460_14000.rdb", "port": 4000},
@@ -13,47 +105,56 @@ node_config = [
     {"name": "node8", "rdb": "redis_node_10921_16383_14008.rdb", "port": 4008},
 ]
 
-# Crear carpeta logs si no existe
-os.makedirs("logs", exist_ok=True)
-
-# Crear archivos de log vacíos si no existen
-for node in node_config:
-    log_path = f"logs/{node['name']}.log"
-    if not os.path.exists(log_path):
-        open(log_path, "a").close()
-
-# Crear logs para microservicios
-for service in ["llm_microservice", "microservice"]:
-    log_path = f"logs/{service}.log"
-    if not os.path.exists(log_path):
-        open(log_path, "a").close()
-
-services = {}
-network_name = "redinternanodos"
-
-# Servicio redis-base para build-only
-services['redis-base'] = {
-    "build": {
-        "context": ".",
-        "dockerfile": "./redis_server/BaseDockerfile"
+# Valores compartidos por los microservicios, calculados una sola vez
+NODE_NAMES = [n["name"] for n in node_config]
+REDIS_HOSTS_REVERSED = ",".join(f"{n['name']}:{n['port']}" for n in reversed(node_config))
+
+# Valores repetidos en varios servicios
+NETWORK = "redinternanodos"
+WORKDIR = "/app"
+RESTART = "on-failure"
+
+# Estructuras idénticas en todos los nodos; se comparten porque el dump no las modifica
+_NETWORKS = [NETWORK]
+_ULIMITS = {
+    "nofile": {
+        "soft": 65536,
+        "hard": 65536
+    }
+}
+
+# Variantes de build para los nodos Redis:
+# - node: imagen redis-base compartida + NodeDockerfile que solo agrega el RDB
+# - standalone: cada nodo compila su propia imagen con redis_server/Dockerfile
+VARIANTS = {
+    "node": {
+        "dockerfile": "./redis_server/NodeDockerfile",
+        "redis_base": True
     },
-    "image": "redis-base:latest",
-    "profiles": ["build-only"]
+    "standalone": {
+        "dockerfile": "./redis_server/Dockerfile",
+        "redis_base": False
+    }
 }
+DEFAULT_VARIANT = "node"
+
 
-# Generar servicios de nodos Redis
-for node in node_config:
+def make_node_service(node, dockerfile):
+    """Arma la entrada de docker-compose para un nodo Redis."""
     node_name = node["name"]
     port = node["port"]
-    log_file = f"./logs/{node_name}.log"    
+    mgmt_port = 14000 + (port - 4000)
+    mgmt_map = f"{mgmt_port}:{mgmt_port}"
+    port_map = f"{port}:{port}"
+    log_file = f"./logs/{node_name}.log"
     rdb_local_path = f"./redis_server/rdb_files/{node['rdb']}"
     rdb_container_path = f"/app/redis_server/rdb_files/{node['rdb']}"
 
-    services[node_name] = {
-        "networks": [network_name],
+    return {
+        "networks": _NETWORKS,
         "build": {
             "context": ".",
-            "dockerfile": "./redis_server/NodeDockerfile",  # Usar NodeDockerfile
+            "dockerfile": dockerfile,
             "args": {
                 "RDB_PATH": f"redis_server/rdb_files/{node['rdb']}"
             }
@@ -66,81 +167,132 @@ for node in node_config:
             "ENCRYPTION_KEY": "${ENCRYPTION_KEY}",
             "RDB_PATH": rdb_container_path
         },
-        "ports": [
-            f"{14000 + (port - 4000)}:{14000 + (port - 4000)}",
-            f"{port}:{port}"
-        ],
+        "ports": [mgmt_map, port_map],
         "volumes": [
             # Solo el volumen de logs, el RDB ya está en la imagen
             f"{rdb_local_path}:{rdb_container_path}",
             f"{log_file}:/app/logs/{node_name}.log"
         ],
-        "ulimits": {
-            "nofile": {
-                "soft": 65536,
-                "hard": 65536
+        "ulimits": _ULIMITS,
+        "command": [str(port)]
+    }
+
+
+def _base_service():
+    """Servicio redis-base, solo para build (profile build-only)."""
+    return {
+        "build": {
+            "context": ".",
+            "dockerfile": "./redis_server/BaseDockerfile"
+        },
+        "image": "redis-base:latest",
+        "profiles": ["build-only"]
+    }
+
+
+def _llm_service():
+    """Microservicio LLM."""
+    return {
+        "networks": _NETWORKS,
+        "build": {
+            "context": ".",
+            "dockerfile": "llm_microservice/Dockerfile"
+        },
+        "restart": RESTART,
+        "image": "llm_microservice",
+        "container_name": "llm_microservice",
+        "working_dir": WORKDIR,
+        "volumes": [
+            "./logs/llm_microservice.log:/app/logs/llm_microservice.log"
+        ],
+        "depends_on": NODE_NAMES,
+        "environment": {
+            "REDIS_NODE_HOSTS": REDIS_HOSTS_REVERSED,
+            "GEMINI_API_KEY": "${GEMINI_API_KEY}",
+            "LOG_FILE": "/app/logs/llm_microservice.log"
+        },
+        "ports": ["4030:4030"],
+        "command": ["/app/llm_microservice_bin"]
+    }
+
+
+def _micro_service():
+    """Microservicio principal."""
+    return {
+        "networks": _NETWORKS,
+        "build": {
+            "context": ".",
+            "dockerfile": "microservice/Dockerfile"
+        },
+        "restart": RESTART,
+        "image": "microservice",
+        "container_name": "microservice",
+        "working_dir": WORKDIR,
+        "volumes": [
+            "./logs/microservice.log:/app/logs/microservice.log"
+        ],
+        "depends_on": NODE_NAMES,
+        "environment": {
+            "REDIS_NODE_HOSTS": REDIS_HOSTS_REVERSED,
+            "LOG_FILE": "/app/logs/microservice.log"
+        },
+        "ports": ["5000:5000"],
+        "command": ["/app/microservice_bin"]
+    }
+
+
+def build_compose(variant):
+    """Arma la estructura completa del docker-compose para la variante pedida."""
+    config = VARIANTS[variant]
+
+    # Armar las entradas en orden y construir el dict de servicios una sola vez
+    entries = [("redis-base", _base_service())] if config["redis_base"] else []
+    entries.extend((n["name"], make_node_service(n, config["dockerfile"])) for n in node_config)
+    entries.append(("llm_microservice", _llm_service()))
+    entries.append(("microservice", _micro_service()))
+    services = dict(entries)
+
+    # Estructura final del docker-compose
+    return {
+        "networks": {
+            NETWORK: {
+                "driver": "bridge"
             }
         },
-        "command": [str(port)]
+        "services": services
     }
 
-# Microservicio LLM
-services["llm_microservice"] = {
-    "networks": [network_name],
-    "build": {
-        "context": ".",
-        "dockerfile": "llm_microservice/Dockerfile"
-    },
-    "restart": "on-failure",
-    "image": "llm_microservice",
-    "container_name": "llm_microservice",
-    "working_dir": "/app",
-    "volumes": [
-        "./logs/llm_microservice.log:/app/logs/llm_microservice.log"
-    ],
-    "depends_on": [n["name"] for n in node_config],
-    "environment": {
-        "REDIS_NODE_HOSTS": ",".join([f"{n['name']}:{n['port']}" for n in node_config[::-1]]),
-        "GEMINI_API_KEY": "${GEMINI_API_KEY}",
-        "LOG_FILE": "/app/logs/llm_microservice.log"
-    },
-    "ports": ["4030:4030"],
-    "command": ["/app/llm_microservice_bin"]
-}
 
-# Microservicio principal
-services["microservice"] = {
-    "networks": [network_name],
-    "build": {
-        "context": ".",
-        "dockerfile": "microservice/Dockerfile"
-    },
-    "restart": "on-failure",
-    "image": "microservice",
-    "container_name": "microservice",
-    "working_dir": "/app",
-    "volumes": [
-        "./logs/microservice.log:/app/logs/microservice.log"
-    ],
-    "depends_on": [n["name"] for n in node_config],
-    "environment": {
-        "REDIS_NODE_HOSTS": ",".join([f"{n['name']}:{n['port']}" for n in node_config[::-1]]),
-        "LOG_FILE": "/app/logs/microservice.log"
-    },
-    "ports": ["5000:5000"],
-    "command": ["/app/microservice_bin"]
-}
+if __name__ == "__main__":
+    variant = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_VARIANT
+    if variant not in VARIANTS:
+        sys.exit(f"Variante desconocida: {variant} (opciones: {', '.join(VARIANTS)})")
 
-# Estructura final del docker-compose
-docker_compose = {
-    "networks": {
-        network_name: {
-            "driver": "bridge"
-        }
-    },
-    "services": services
-}
+    # Crear carpeta logs si no existe
+    os.makedirs("logs", exist_ok=True)
+
+    # Crear archivos de log vacíos (nodos y microservicios) si no existen
+    existing = {e.name for e in os.scandir("logs")}
+    needed = {f"{n['name']}.log" for n in node_config} | {"llm_microservice.log", "microservice.log"}
+    for name in needed - existing:
+        open(f"logs/{name}", "a").close()
+
+    # Serializar a bytes en memoria para comparar con el archivo actual
+    content = dump_compose(build_compose(variant))
+    try:
+        with open("docker-compose.yml", "rb") as f:
+            current = f.read()
+    except FileNotFoundError:
+        current = b""
 
-# Escribir el archivo docker-compose.yml
-with open("docker-compose.yml", "w") as f:
-    yaml.dump(docker_compose, f, sort_keys=False, default_flow_style=False, indent=2)
+    # Escribir docker-compose.yml solo si cambió, para no invalidar el cache de Docker
+    if content != current:
+        try:
+            with open("docker-compose.yml.tmp", "wb", buffering=65536) as f:
+                f.write(content)
+            os.replace("docker-compose.yml.tmp", "docker-compose.yml")
+        except BaseException:
+            # No dejar el temporal a medio escribir en el árbol de trabajo
+            if os.path.exists("docker-compose.yml.tmp"):
+                os.remove("docker-compose.yml.tmp")
+            raise
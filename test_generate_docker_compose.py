@@ -0,0 +1,42 @@
+import unittest
+
+import yaml
+
+from generate_docker_compose import VARIANTS, build_compose, dump_compose
+
+
+class DumpComposeTest(unittest.TestCase):
+    def test_variantes_se_leen_igual_con_pyyaml(self):
+        for variant in VARIANTS:
+            with self.subTest(variant=variant):
+                compose = build_compose(variant)
+                self.assertEqual(yaml.safe_load(dump_compose(compose)), compose)
+
+    def test_escalares_ambiguos_se_leen_como_string(self):
+        valores = [
+            "4000", "22:22", "80:80", "14000:14000", ".5", "0x1F", "0o17", "017",
+            "1_000", "1e3", "+.inf", ".nan", "2024-01-01", "true", "off", "null", "~",
+            "", "a: b", "a #b", "a:", "#x", "*x", "&x", "-", "-x", "<<", "=", "x ",
+            "it's", "ñ", "x\ny", "😀\n", "\x7f\x85\u2028\ufeff\"\\", "${ENCRYPTION_KEY}",
+            "node0:4000,node1:4001"
+        ]
+        compose = {"mapping": {f"k{i}": v for i, v in enumerate(valores)}, "lista": valores}
+        self.assertEqual(yaml.safe_load(dump_compose(compose)), compose)
+
+    def test_contenedores_vacios_y_booleanos(self):
+        compose = {"vacio": {}, "lista_vacia": [], "si": True, "no": False, "numero": 0}
+        salida = dump_compose(compose)
+        self.assertIn(b"vacio: {}\n", salida)
+        self.assertIn(b"lista_vacia: []\n", salida)
+        self.assertIn(b"si: true\n", salida)
+        self.assertEqual(yaml.safe_load(salida), compose)
+
+    def test_tipos_no_soportados(self):
+        for valor in [None, 1.5, [{"a": 1}], [[1]]]:
+            with self.subTest(valor=valor):
+                with self.assertRaises(TypeError):
+                    dump_compose({"clave": valor})
+
+
+if __name__ == "__main__":
+    unittest.main()